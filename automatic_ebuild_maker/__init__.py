@@ -0,0 +1,3 @@
+"""Automatic conversion of binary packages to Gentoo .ebuild files."""
+
+__version__ = "1.0.0"
@@ -0,0 +1,615 @@
+from os import mkdir, path
+from sys import argv, exit
+
+from . import __version__, output
+from .constants import CACHE_DIR, DATABASE_FILE, STORE_DIRNAME, TEMPLATES_DIR
+from .output import (
+    echo,
+    emit,
+    phase,
+    print_error,
+    print_ok,
+    print_warning,
+    report_warnings,
+    verbose_print,
+)
+
+
+def quit_handler(_, __):
+    """Handler for exit signal."""
+    print("\nSIGINT or CTRL-C detected. Exiting")
+    exit(1)
+
+
+def create_parser():
+    from optparse import OptionParser
+
+    parser = OptionParser(version=f"%prog {__version__}")
+
+    parser.add_option(
+        "",
+        "--system-ffmpeg",
+        action="store_true",
+        dest="system_ffmpeg",
+        default=False,
+        help="Try to include system-ffmpeg USE flag to the ebuild",
+    )
+    parser.add_option(
+        "",
+        "--system-mesa",
+        action="store_true",
+        dest="system_mesa",
+        default=False,
+        help="Try to include system-mesa USE flag to the ebuild",
+    )
+    parser.add_option(
+        "-v",
+        "--verbose",
+        action="store_true",
+        dest="verbose",
+        default=False,
+        help="run script in verbose mode",
+    )
+
+    parser.add_option(
+        "-u",
+        "--url",
+        dest="url",
+        help="specify input package file (.deb, .rpm, .tar.*, .AppImage) url, local path or directory",
+        metavar="SRC_URI",
+    )
+    parser.add_option(
+        "",
+        "--batch",
+        dest="batch",
+        help="read more inputs like --url from FILE, one package per line",
+        metavar="FILE",
+    )
+    parser.add_option(
+        "",
+        "--src-uri",
+        dest="src_uri",
+        default="",
+        help="specify upstream url of local input files (@ARCH@ and @FILENAME@ are replaced)",
+        metavar="URL",
+    )
+    parser.add_option(
+        "",
+        "--database",
+        action="append",
+        dest="database",
+        default=[],
+        help="merge additional database file over the default ones (repeatable)",
+        metavar="FILE",
+    )
+    parser.add_option(
+        "",
+        "--overlay",
+        action="append",
+        dest="overlay",
+        default=[],
+        help="merge database from <overlay>/metadata/automatic-ebuild-maker/",
+        metavar="DIR",
+    )
+    parser.add_option(
+        "",
+        "--homepage",
+        dest="homepage",
+        help="specify ebuild homepage",
+        metavar="HOMEPAGE",
+    )
+    parser.add_option(
+        "",
+        "--license",
+        dest="license",
+        help="specify ebuild license",
+        metavar="LICENSE",
+    )
+    parser.add_option(
+        "",
+        "--wm-class",
+        dest="wm_class",
+        help="specify WM_CLASS of application for .desktop launcher",
+        metavar="WM_CLASS",
+    )
+
+    parser.add_option(
+        "",
+        "--check",
+        action="store_true",
+        dest="check",
+        default=False,
+        help="only validate arguments and database files, don't download anything",
+    )
+    parser.add_option(
+        "",
+        "--json",
+        action="store_true",
+        dest="json",
+        default=False,
+        help="print newline-delimited JSON events instead of text",
+    )
+    parser.add_option(
+        "",
+        "--export-json",
+        action="store_true",
+        dest="export_json",
+        default=False,
+        help="export structure and analysis of the ebuild to .json file",
+    )
+    parser.add_option(
+        "",
+        "--report",
+        action="store_true",
+        dest="report",
+        default=False,
+        help="report missing database entries of all processed packages",
+    )
+    parser.add_option(
+        "",
+        "--gc",
+        action="store_true",
+        dest="gc",
+        default=False,
+        help="remove stored files not used by any extracted package in cache",
+    )
+
+    parser.add_option(
+        "-j",
+        "--jobs",
+        type="int",
+        dest="jobs",
+        default=1,
+        help="extract and analyse up to N packages in parallel processes",
+        metavar="N",
+    )
+    parser.add_option(
+        "",
+        "--download-jobs",
+        type="int",
+        dest="download_jobs",
+        default=4,
+        help="download up to N files at once when running with --jobs",
+        metavar="N",
+    )
+    parser.add_option(
+        "",
+        "--write-jobs",
+        type="int",
+        dest="write_jobs",
+        default=1,
+        help="write files of up to N packages at once when running with --jobs",
+        metavar="N",
+    )
+
+    parser.add_option(
+        "",
+        "--amd64",
+        action="store_true",
+        dest="amd64",
+        default=False,
+        help="package is available for amd64 <arch>",
+    )
+    parser.add_option(
+        "",
+        "--arm64",
+        action="store_true",
+        dest="arm64",
+        default=False,
+        help="package is available for amd64 <arch>",
+    )
+    parser.add_option(
+        "",
+        "--i386",
+        action="store_true",
+        dest="i386",
+        default=False,
+        help="package is available for i386 <arch>",
+    )
+    parser.add_option(
+        "",
+        "--i686",
+        action="store_true",
+        dest="i686",
+        default=False,
+        help="package is available for i686 <arch>",
+    )
+
+    return parser
+
+
+def get_architectures(options):
+    architectures = []
+    if options.amd64:
+        architectures.append("amd64")
+    if options.arm64:
+        architectures.append("arm64")
+    if options.i386:
+        architectures.append("i386")
+    if options.i686:
+        architectures.append("i686")
+    return architectures
+
+
+def get_inputs(options):
+    """Return input given by --url and lines of --batch file."""
+    inputs = [options.url] if options.url else []
+    if options.batch:
+        with open(options.batch) as batch_file:
+            for line in batch_file:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    inputs.append(line)
+    return inputs
+
+
+def get_input_urls(options, url):
+    """Return input URLs by architecture, "" if architecture is not specified."""
+    if "@ARCH@" in url:
+        return {
+            architecture: url.replace("@ARCH@", architecture)
+            for architecture in get_architectures(options)
+        }
+    return {"": url}
+
+
+def validate_options(options):
+    """Return list of problems with input file options."""
+    if min(options.jobs, options.download_jobs, options.write_jobs) < 1:
+        return ["Number of jobs has to be at least 1."]
+
+    try:
+        inputs = get_inputs(options)
+    except OSError:
+        return [f"Batch file {options.batch} can't be read!"]
+
+    if not inputs:
+        return ["Input file not specified. Please, use --url option."]
+
+    problems = []
+    for url in inputs:
+        problems += validate_input(options, url)
+    return problems
+
+
+def validate_input(options, url):
+    """Return list of problems with one input file, URL or directory."""
+    from .sources import source_type
+    from .utils import local_path
+
+    input_path = local_path(url)
+    if not input_path and not url.startswith(("http://", "https://")):
+        return [
+            f"Wrong input {url}. Input file has to be specified "
+            "by the URL address or local path."
+        ]
+
+    if path.isdir(input_path):
+        return []
+
+    if not source_type(url):
+        return [f"Unsupported type of input file {url}."]
+
+    if "@ARCH@" in url and not get_architectures(options):
+        return [
+            "You have to provide at least one architecture when using @ARCH@ in url"
+        ]
+
+    problems = []
+    if input_path:
+        for architecture_url in get_input_urls(options, url).values():
+            if not path.isfile(local_path(architecture_url)):
+                problems.append(f"File {local_path(architecture_url)} not found!")
+    return problems
+
+
+def load_options_database(options):
+    """Return database merged from default layers and layers given in options."""
+    from .database import database_layers, load_database
+
+    layers = database_layers(options.database, options.overlay)
+
+    if not layers:
+        print_warning("[warning] Database file not found.")
+        emit("warning", code="missing-database", message="Database file not found.")
+        return {}
+
+    verbose_print("\n[ok] Found database files:")
+    for layer in layers:
+        verbose_print("   - %s" % layer)
+    database, database_provenance = load_database(layers)
+    for key in sorted(database_provenance):
+        if database_provenance[key] != DATABASE_FILE:
+            verbose_print(f"   * {key} <- {database_provenance[key]}")
+    return database
+
+
+def check(options):
+    """Validate options and database without touching network or archives."""
+    from .database import check_database
+
+    problems = validate_options(options) if options.url or options.batch else []
+
+    try:
+        problems += check_database(load_options_database(options))
+    except FileNotFoundError as error:
+        problems.append(f"Database file {error} not found!")
+    except ValueError as error:
+        problems.append(f"Database file {error}")
+
+    for problem in problems:
+        print_error(problem)
+    if not problems:
+        print_ok("[ok] Arguments and database are valid.")
+        emit("check", valid=True)
+    output.flush()
+    return 1 if problems else 0
+
+
+def group_source_files(directory, src_uri=""):
+    """Return package files from directory grouped by package name and version.
+
+    Files are grouped by their metadata only, extraction is left to the analysis.
+    Return also number of files, which can't be read.
+    """
+    from glob import glob
+
+    from .sources import source_type
+
+    groups = {}
+    failed = 0
+    for filename in sorted(glob(path.join(directory, "*"))):
+        source_class = source_type(filename)
+        if not source_class:
+            continue
+        source = source_class(filename, src_uri=src_uri)
+        try:
+            data = source.read_package_info()
+        except Exception as error:
+            print_error(f"Reading of {source.filename} failed: {error}")
+            failed += 1
+            continue
+        if data.get("Architecture"):
+            source.architecture = data["Architecture"]
+        key = (data.get("Package") or source.filename, data.get("Version", ""))
+        groups.setdefault(key, []).append(source)
+    return [groups[key] for key in sorted(groups)], failed
+
+
+def get_packages(options):
+    """Return package files of all inputs grouped by package.
+
+    Return also number of files, which can't be read.
+    """
+    from .sources import source_type
+    from .utils import local_path
+
+    packages = []
+    failed = 0
+    for url in get_inputs(options):
+        input_path = local_path(url)
+        if path.isdir(input_path):
+            groups, group_failed = group_source_files(input_path, options.src_uri)
+            if not groups and not group_failed:
+                print_error(f"No package files found in {input_path}")
+                failed += 1
+            packages += groups
+            failed += group_failed
+        else:
+            source_class = source_type(url)
+            packages.append(
+                [
+                    source_class(
+                        architecture_url, arch=architecture, src_uri=options.src_uri
+                    )
+                    for architecture, architecture_url in get_input_urls(
+                        options, url
+                    ).items()
+                ]
+            )
+    return packages, failed
+
+
+def report_file(kind, filename):
+    print_ok(f"File {filename} created.")
+    emit("file-created", kind=kind, path=path.abspath(filename))
+
+
+def report(options):
+    """Rank missing database entries and write database patch skeleton."""
+    from json import dump
+
+    from .report import build_report, load_analyses, patch_skeleton, print_report
+
+    try:
+        database = load_options_database(options)
+    except FileNotFoundError as error:
+        print_error(f"Database file {error} not found!")
+        return 1
+    except ValueError as error:
+        print_error(f"Database file {error}")
+        return 1
+
+    analyses = load_analyses()
+    if not analyses:
+        print_error("No analysed packages found. Run the script with --url first.")
+        return 1
+
+    missing = build_report(analyses, database)
+    print_report(missing, len(analyses))
+
+    patch = patch_skeleton(missing)
+    if patch:
+        with open("database-patch.json", "w") as patch_file:
+            dump(patch, patch_file, indent=2)
+            patch_file.write("\n")
+        echo()
+        report_file("patch", "database-patch.json")
+    output.flush()
+    return 0
+
+
+def collect_garbage():
+    """Remove blobs of the extraction store, which are not linked anymore."""
+    from .store import collect_garbage
+
+    store = CACHE_DIR + STORE_DIRNAME
+    removed, freed = collect_garbage(store) if path.isdir(store) else (0, 0)
+    print_ok(f"[ok] Removed {removed} unused files, {freed / (1 << 20):.1f} MiB freed.")
+    emit("gc", removed=removed, bytes=freed)
+    output.flush()
+    return 0
+
+
+def create_ebuild_files(input_files, options, database):
+    """Create .ebuild and metadata.xml files for one package."""
+    from .ebuild import Ebuild
+
+    with phase("analysis", file=input_files[0].filename):
+        ebuild = Ebuild(sources=input_files, options=options, database=database)
+
+    save_ebuild_files(ebuild, options, database)
+
+
+def save_ebuild_files(ebuild, options, database):
+    """Write files of analysed package and report its warnings."""
+    from .report import save_analysis
+
+    with phase("render", package=ebuild.package):
+        document = write_ebuild_files(ebuild, options, database)
+
+    save_analysis(document.analysis)
+    report_warnings(ebuild.warnings)
+    output.flush()
+
+
+def write_ebuild_files(ebuild, options, database):
+    from json import dumps
+
+    # Build .ebuild file
+
+    document = ebuild.build_document()
+
+    with open(TEMPLATES_DIR + "template.ebuild") as template:
+        ebuild_content = document.render(template.read())
+
+    with open(ebuild.name(), "w") as ebuild_file:
+        ebuild_file.write(ebuild_content)
+
+    report_file("ebuild", ebuild.name())
+
+    if options.export_json:
+        json_name = ebuild.name().replace(".ebuild", ".json")
+        with open(json_name, "w") as json_file:
+            json_file.write(dumps(document.to_json(), indent=2, sort_keys=True))
+            json_file.write("\n")
+        report_file("json", json_name)
+
+    # Build metadata.xml file
+
+    with open(TEMPLATES_DIR + "metadata.xml") as template:
+        metadata_content = template.read()
+
+    description = ""
+
+    if ebuild.description_lines:
+        for des_line in ebuild.description_lines:
+            while des_line[0] == " ":
+                des_line = des_line[1:]
+            while des_line[-1] in [" ", "\n"]:
+                des_line = des_line[:-1]
+            description += f"\n\t\t{des_line}"
+        description += "\n\t"
+
+        metadata_content = metadata_content.replace("@DESCRIPTION@", description)
+
+    elif ebuild.description:
+        metadata_content = metadata_content.replace(
+            "@DESCRIPTION@",
+            f"\n\t\t{ebuild.description}\n\t" f"</longdescription>\n",
+        )
+
+    use_flags = ""
+    if ebuild.use_flags:
+        for use_flag in ebuild.use_flags:
+            if use_flag in database["use-descriptions"]:
+                use_flags += f'\n\t\t<flag name="{use_flag}">{database["use-descriptions"][use_flag]}</flag>'
+        use_flags += "\n\t"
+
+    metadata_content = metadata_content.replace("@USE@", use_flags)
+
+    metadata_name = f'{ebuild.package.replace(".", "-")}-metadata.xml'
+    with open(metadata_name, "w") as metadata_file:
+        metadata_file.write(metadata_content)
+
+    report_file("metadata", metadata_name)
+
+    return document
+
+
+def main(arguments=None):
+    if arguments is None:
+        arguments = argv[1:]
+
+    # Fast path, which doesn't need the option parser.
+    if arguments == ["--version"]:
+        print(f"automatic-ebuild-maker {__version__}")
+        return
+
+    options, _ = create_parser().parse_args(arguments)
+
+    from signal import signal, SIGINT
+
+    signal(SIGINT, quit_handler)
+    output.verbose = options.verbose
+    output.json_output = options.json
+
+    if options.check:
+        exit(check(options))
+
+    if options.report:
+        exit(report(options))
+
+    if options.gc:
+        exit(collect_garbage())
+
+    problems = validate_options(options)
+    if problems:
+        for problem in problems:
+            print_error(problem)
+        exit(1)
+
+    if not path.isdir(CACHE_DIR):
+        try:
+            mkdir(CACHE_DIR)
+        except OSError:
+            print_error(f"Creation of the directory {CACHE_DIR} failed!")
+            exit(1)
+
+    try:
+        database = load_options_database(options)
+    except FileNotFoundError as error:
+        print_error(f"Database file {error} not found!")
+        exit(1)
+    except ValueError as error:
+        print_error(f"Database file {error}")
+        exit(1)
+
+    packages, failed = get_packages(options)
+
+    if options.jobs > 1:
+        from .pipeline import run_pipeline
+
+        failed += run_pipeline(packages, options, database, save_ebuild_files)
+    else:
+        for input_files in packages:
+            files = [source.filename for source in input_files]
+            with phase("package", files=files):
+                try:
+                    create_ebuild_files(input_files, options, database)
+                except Exception as error:
+                    print_error(f"Package {input_files[0].filename} failed: {error}")
+                    failed += 1
+
+    if failed:
+        exit(1)
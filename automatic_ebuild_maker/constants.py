@@ -0,0 +1,49 @@
+from os import path
+
+REAL_PATH = path.dirname(path.dirname(path.realpath(__file__)))
+DATABASE_FILE = REAL_PATH + "/database.json"
+TEMPLATES_DIR = REAL_PATH + "/templates/"
+
+CACHE_DIR = "/tmp/automatic-ebuild-maker-cache/"
+DATABASE_CACHE_FILE = CACHE_DIR + "database-cache.json"
+ANALYSIS_DIR = CACHE_DIR + "analysis/"
+STORE_DIRNAME = "store/"
+
+DATABASE_SECTIONS = [
+    "bundled-libraries",
+    "dependencies",
+    "dependencies-optional",
+    "deprecated-movable",
+    "deprecated-removable",
+    "unnecessary-files",
+    "use-dependencies",
+    "use-descriptions",
+    "use-symlinks",
+]
+
+KEYWORDS = {"i386": "x86", "i686": "x86"}
+ARCHITECTURES = {
+    "amd64": "amd64",
+    "x86_64": "amd64",
+    "x64": "amd64",
+    "arm64": "arm64",
+    "aarch64": "arm64",
+    "i386": "i386",
+    "ia32": "i386",
+    "i686": "i686",
+}
+MULTILINE_VARIABLES = ["SRC_URI"]
+
+RPM_LEAD_MAGIC = b"\xed\xab\xee\xdb"
+RPM_HEADER_MAGIC = b"\x8e\xad\xe8"
+RPM_TAGS = {
+    "name": 1000,
+    "version": 1001,
+    "summary": 1004,
+    "description": 1005,
+    "license": 1014,
+    "url": 1020,
+    "arch": 1022,
+    "requires": 1049,
+    "compressor": 1125,
+}
@@ -0,0 +1,123 @@
+from json import dump, load
+from os import environ, path, stat
+
+from .constants import DATABASE_CACHE_FILE, DATABASE_FILE, DATABASE_SECTIONS
+
+database_cache = {}
+
+
+def database_layers(database_files=None, overlays=None):
+    """Return existing database files ordered from the lowest to the highest priority."""
+    config_home = environ.get("XDG_CONFIG_HOME", path.expanduser("~/.config"))
+    candidates = [
+        DATABASE_FILE,
+        "/etc/automatic-ebuild-maker/database.json",
+        config_home + "/automatic-ebuild-maker/database.json",
+    ]
+    for overlay in overlays or []:
+        candidates.append(
+            path.join(overlay, "metadata", "automatic-ebuild-maker", "database.json")
+        )
+
+    layers = [layer for layer in candidates if path.isfile(layer)]
+    for database_file in database_files or []:
+        if not path.isfile(database_file):
+            raise FileNotFoundError(database_file)
+        layers.append(database_file)
+    return layers
+
+
+def merge_database(database, layer, source, provenance, prefix=""):
+    """Deep-merge layer into database and record source file of every changed key.
+
+    Dictionaries are merged recursively, lists are extended with missing items
+    and null value removes the key from lower layers.
+    """
+    for key, value in layer.items():
+        key_path = prefix + key
+        if value is None:
+            database.pop(key, None)
+        elif isinstance(value, dict) and isinstance(database.get(key), dict):
+            merge_database(database[key], value, source, provenance, key_path + "/")
+            continue
+        elif isinstance(value, list) and isinstance(database.get(key), list):
+            for item in value:
+                if item not in database[key]:
+                    database[key].append(item)
+        else:
+            database[key] = value
+        provenance[key_path] = source
+
+
+def load_database(layers):
+    """Return merged database and its provenance, cached by mtimes of the layers."""
+    stamp = [[layer, stat(layer).st_mtime_ns] for layer in layers]
+    key = str(stamp)
+
+    if key in database_cache:
+        return database_cache[key]
+
+    try:
+        with open(DATABASE_CACHE_FILE) as cache_file:
+            cached = load(cache_file)
+        if cached["layers"] == stamp:
+            database_cache[key] = cached["database"], cached["provenance"]
+            return database_cache[key]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    merged = {}
+    provenance = {}
+    for layer in layers:
+        with open(layer) as json_file:
+            try:
+                layer_data = load(json_file)
+            except ValueError as error:
+                raise ValueError(f"{layer} is not valid JSON: {error}")
+        merge_database(merged, layer_data, layer, provenance)
+
+    try:
+        with open(DATABASE_CACHE_FILE, "w") as cache_file:
+            dump(
+                {"layers": stamp, "database": merged, "provenance": provenance},
+                cache_file,
+            )
+    except OSError:
+        pass
+
+    database_cache[key] = merged, provenance
+    return database_cache[key]
+
+
+def check_database(database):
+    """Return list of inconsistencies found in merged database."""
+    problems = []
+    for section in DATABASE_SECTIONS:
+        if section not in database:
+            problems.append(f'Section "{section}" is missing.')
+        elif section == "deprecated-removable":
+            if not isinstance(database[section], list):
+                problems.append(f'Section "{section}" has to be a list.')
+        elif not isinstance(database[section], dict):
+            problems.append(f'Section "{section}" has to be an object.')
+    if problems:
+        return problems
+
+    for dependency, use in sorted(database["dependencies-optional"].items()):
+        if use not in database["use-dependencies"]:
+            problems.append(
+                f'USE flag "{use}" of optional dependency "{dependency}" '
+                "is missing in use-dependencies."
+            )
+
+    for use in sorted(database["use-symlinks"]):
+        if use not in database["unnecessary-files"]:
+            problems.append(
+                f'USE flag "{use}" of use-symlinks is missing in unnecessary-files.'
+            )
+
+    for use, files in sorted(database["unnecessary-files"].items()):
+        if not isinstance(files, list):
+            problems.append(f'Unnecessary files of USE flag "{use}" have to be a list.')
+
+    return problems
@@ -0,0 +1,718 @@
+from os import path
+from re import findall, fullmatch, sub
+
+from .constants import KEYWORDS, MULTILINE_VARIABLES
+from .sources import Source
+from .utils import collapse_paths, find_files, parse_dependency
+
+
+def render_statement(statement, depth=1):
+    """Return statement or Block of phase function indented to given depth."""
+    if isinstance(statement, Block):
+        return statement.render(depth)
+    return "\t" * depth + statement
+
+
+def statement_to_json(statement):
+    if isinstance(statement, Block):
+        return statement.to_json()
+    return statement
+
+
+class Block:
+    """Class representing conditional block of statements in phase function"""
+
+    def __init__(self, condition, statements=None):
+        self.condition = condition
+        self.statements = statements or []
+
+    def render(self, depth=1):
+        indent = "\t" * depth
+        lines = [f"{indent}if {self.condition} ; then"]
+        lines += [render_statement(s, depth + 1) for s in self.statements]
+        lines.append(f"{indent}fi")
+        return "\n".join(lines)
+
+    def to_json(self):
+        return {
+            "if": self.condition,
+            "then": [statement_to_json(s) for s in self.statements],
+        }
+
+
+class Phase:
+    """Class representing phase function as groups of statements"""
+
+    def __init__(self, name, default=False):
+        self.name = name
+        self.default = default
+        self.groups = []
+
+    def __bool__(self):
+        return any(self.groups)
+
+    def add_group(self, statements):
+        statements = list(statements)
+        if statements:
+            self.groups.append(statements)
+
+    def render(self):
+        chunks = ["\tdefault"] if self.default else []
+        for group in self.groups:
+            chunks.append("\n".join(render_statement(s) for s in group))
+        body = "\n\n".join(chunks)
+        return f"{self.name}() {{\n{body}\n}}\n"
+
+    def to_json(self):
+        return {
+            "default": self.default,
+            "groups": [[statement_to_json(s) for s in g] for g in self.groups],
+        }
+
+
+class DependencyTree:
+    """Class representing dependency specification (e.g. RDEPEND)"""
+
+    def __init__(self):
+        self.atoms = []
+        self.use_conditional = {}
+        self.any_of = []
+
+    def add_atom(self, atom):
+        if atom not in self.atoms:
+            self.atoms.append(atom)
+
+    def render(self):
+        lines = sorted(self.atoms)
+        for use in sorted(self.use_conditional):
+            lines.append(f"{use}? ( {self.use_conditional[use]} )")
+        for group in sorted(self.any_of):
+            lines.append("|| (")
+            for atom, use in group:
+                lines.append(f"\t{use}? ( {atom} )" if use else f"\t{atom}")
+            lines.append(")")
+        return "\n\t".join(lines)
+
+    def to_json(self):
+        return {
+            "atoms": sorted(self.atoms),
+            "use": dict(sorted(self.use_conditional.items())),
+            "any-of": [
+                [{"atom": atom, "use": use or None} for atom, use in group]
+                for group in sorted(self.any_of)
+            ],
+        }
+
+
+class EbuildDocument:
+    """Class representing structure of .ebuild file before rendering"""
+
+    def __init__(self, name):
+        self.name = name
+        self.variables = {}
+        self.phases = []
+        self.analysis = {}
+
+    def render_variable(self, name):
+        value = self.variables[name]
+        if isinstance(value, DependencyTree):
+            return value.render()
+        if isinstance(value, list):
+            return ("\n\t" if name in MULTILINE_VARIABLES else " ").join(value)
+        return str(value)
+
+    def render(self, template):
+        """Fill template placeholders in one pass and append remaining parts."""
+        used = set(findall(r"@([A-Z_]+)@", template))
+        content = sub(
+            r"@([A-Z_]+)@",
+            lambda match: self.render_variable(match.group(1)),
+            template,
+        )
+        for name in self.variables:
+            if name not in used:
+                content += f"\n{name}={self.render_variable(name)}\n"
+        for phase in self.phases:
+            if phase:
+                content += "\n" + phase.render()
+        return content
+
+    def to_json(self):
+        variables = {}
+        for name, value in self.variables.items():
+            variables[name] = (
+                value.to_json() if isinstance(value, DependencyTree) else value
+            )
+        return {
+            "name": self.name,
+            "variables": variables,
+            "phases": {phase.name: phase.to_json() for phase in self.phases if phase},
+            "analysis": self.analysis,
+        }
+
+
+class Ebuild:
+    """Class representing .ebuild file"""
+
+    package = ""
+    version = ""
+
+    eapi = 7
+    description = ""
+    homepage = ""
+    license = ""
+    slot = 0
+
+    root = ""
+    layout = "root"
+    workdir = ""
+    native_bin = ""
+
+    doc_directory = ""
+    wm_class = ""
+
+    def __init__(self, *_, sources: [Source] = None, options=None, database=None):
+        self.options = options
+        self.database = database
+        self.warnings = []
+
+        self.inherit = []
+        self.description_lines = []
+        self.restrict = ["bindist", "mirror"]
+        self.use_flags = []
+        self.tmp_use_flags = []
+        self.package_dependencies = []
+        self.library_dependencies = []
+        self.normal_dependencies = []
+
+        self.unnecessary_files = {}
+        self.fixes = {"move": [], "remove": []}
+        self.desktop_files = []
+        self.archives_in_doc_directory = []
+        self.potencial_run_files = []
+        self.shared_libraries = []
+
+        self.sources = []
+        self.control_data = {}
+        self.unpack_statements = []
+
+        if sources:
+            # Making ebuild from package files
+
+            self.sources = sources
+            source = sources[0]
+            data = source.get_control_data()
+            self.control_data = data
+            if source.eclass:
+                self.inherit.append(source.eclass)
+            self.layout = source.layout
+            self.unpack_statements = source.unpack_statements()
+
+            if "Package" in data:
+                self.package = data["Package"]
+            else:
+                self.package = "unknown"
+                self.warn(
+                    "missing-package-name",
+                    f'Package name not found. Using "{self.package}" instead.',
+                )
+
+            if "Version" in data:
+                self.version = data["Version"].split("-")[0]
+            else:
+                self.version = "1.0.0"
+                self.warn(
+                    "missing-version",
+                    f'Package version not found. Using "{self.version}" instead.',
+                )
+
+            if self.options.homepage:
+                self.homepage = self.options.homepage
+            elif "Homepage" in data:
+                self.homepage = data["Homepage"]
+            else:
+                self.warn("missing-homepage", "Package homepage is missing.")
+
+            if self.options.license:
+                self.license = self.options.license
+            elif "License" in data and data["License"] != "unknown":
+                self.license = data["License"].replace("v", "-").replace("3.0", "3")
+            else:
+                self.license = "all-rights-reserved"
+                self.warn(
+                    "missing-license",
+                    'Package license is missing. Using "all-rights-reserved".',
+                )
+
+            if "Description" in data:
+                self.description = data["Description"]
+            else:
+                self.warn("missing-description", "Package description is missing.")
+
+            if "Description lines" in data:
+                self.description_lines = data["Description lines"]
+
+            self.root = source.get_root()
+            self.workdir = source.get_workdir(self.version)
+
+            for source_file in sources:
+                if not source_file.src_uri:
+                    source_file.src_uri = source_file.filename
+                    self.warn(
+                        "missing-src-uri",
+                        f"Upstream URL of local file {source_file.filename} is missing. "
+                        "Please, use --src-uri option.",
+                        file=source_file.filename,
+                    )
+                if not source_file.architecture:
+                    source_file.architecture = "amd64"
+                    self.warn(
+                        "unknown-architecture",
+                        f"Architecture of {source_file.filename} not detected. "
+                        'Using "amd64".',
+                        file=source_file.filename,
+                    )
+
+            if self.options.system_ffmpeg:
+                self.tmp_use_flags.append("system-ffmpeg")
+
+            if self.options.system_mesa:
+                self.tmp_use_flags.append("system-mesa")
+
+            self.parse_dependencies()
+            self.update_unnecessary_files()
+            self.update_desktop_files()
+            self.update_doc_directory()
+            self.update_archives_in_directory(self.doc_directory)
+            self.update_potencial_run_files()
+            self.update_wmclass()
+            self.update_fixes()
+            self.update_shared_libraries()
+            # self.update_use_dependencies()
+
+    def name(self):
+        return f'{self.package.replace(".", "-")}-{self.version}.ebuild'
+
+    def warn(self, code, message, **fields):
+        """Record warning with machine-readable code for the user."""
+        self.warnings.append({"code": code, "message": message, **fields})
+
+    def add_source(self, source):
+        if source not in self.sources:
+            self.sources.append(source)
+
+    def add_use_flag(self, use):
+        if use not in self.use_flags:
+            self.use_flags.append(use)
+            self.use_flags.sort()
+
+    def get_architectures(self):
+        return list(self.get_src_uris().keys())
+
+    def get_src_uris(self):
+        uris = {}
+
+        for source in self.sources:
+            if source.architecture:
+                uris[source.architecture] = source.get_src_uri()
+        return uris
+
+    def get_sources(self):
+        """Return sources by architecture, the last one of each architecture wins."""
+        return {source.architecture: source for source in self.sources}
+
+    def parse_dependencies(self):
+        package_dependencies = self.control_data["Depends"]
+        self.package_dependencies = [
+            parse_dependency(dep) for dep in package_dependencies if dep
+        ]
+        # Sonames required by .rpm packages.
+        self.library_dependencies = self.control_data.get("Depends libraries", [])
+
+    def convert_dependencies(self, dependencies):
+        def convert_dependency(d):
+            if d in self.database["dependencies"]:
+                return self.database["dependencies"][d], False
+            if d in self.database["dependencies-optional"]:
+                dep_use = self.database["dependencies-optional"][d]
+                return self.database["use-dependencies"][dep_use], dep_use
+            return False, False
+
+        result = []
+        for dep in dependencies:
+            if isinstance(dep, list):
+                converted = self.convert_dependencies(dep)
+                if len(converted) > 1:
+                    result.append(converted)
+                else:
+                    result += converted
+            else:
+                converted = convert_dependency(dep)
+                if converted[0]:
+                    if converted not in result:
+                        result.append(converted)
+                else:
+                    self.warn(
+                        "unmapped-dependency",
+                        f'Gentoo alternative dependency for "{dep}" not found in database.json.',
+                        dependency=dep,
+                    )
+        return result
+
+    def build_dependencies(self):
+        dependencies = self.convert_dependencies(self.package_dependencies)
+        tree = DependencyTree()
+
+        for dep in dependencies:
+            if isinstance(dep, list):
+                tree.any_of.append(sorted(dep))
+                for d in dep:
+                    if d[1]:
+                        self.add_use_flag(d[1])
+            else:
+                if dep[1]:
+                    tree.use_conditional[dep[1]] = dep[0]
+                    self.add_use_flag(dep[1])
+                else:
+                    tree.add_atom(dep[0])
+
+        for library in self.library_dependencies:
+            if library in self.database["bundled-libraries"]:
+                tree.add_atom(self.database["bundled-libraries"][library])
+            else:
+                self.warn(
+                    "unmapped-library-dependency",
+                    f'Gentoo package providing "{library}" not found in database.json.',
+                    library=library,
+                )
+
+        for dep in self.normal_dependencies:
+            tree.add_atom(dep)
+
+        for use in self.tmp_use_flags:
+            if use in self.database["use-dependencies"]:
+                tree.use_conditional[use] = self.database["use-dependencies"][use]
+
+        return tree
+
+    def update_unnecessary_files(self):
+        for use in self.tmp_use_flags:
+            if use in self.database["unnecessary-files"]:
+                files = self.database["unnecessary-files"][use]
+                found = []
+                for unnecessary_file in files:
+                    found += find_files(self.root, f"**/{unnecessary_file}")
+                tmp = collapse_paths(found)
+                if tmp:
+                    self.unnecessary_files[use] = tmp
+                    self.add_use_flag(use)
+
+        bundled_libraries = self.database["bundled-libraries"]
+
+        for library in bundled_libraries:
+            found = find_files(self.root, f"**/{library}")
+
+            if found:
+                if (
+                    self.database["bundled-libraries"][library]
+                    not in self.normal_dependencies
+                ):
+                    self.normal_dependencies.append(
+                        self.database["bundled-libraries"][library]
+                    )
+
+                self.fixes["remove"] += found
+
+    def update_desktop_files(self):
+        self.desktop_files = sorted(
+            desktop
+            for desktop in find_files(self.root, "**/*.desktop")
+            if not path.isdir(self.root + "/" + desktop)
+        )
+        if self.desktop_files:
+            self.inherit.append("xdg")
+            if self.layout == "bundle":
+                self.inherit.append("desktop")
+                self.warn(
+                    "bundle-desktop-files",
+                    "Desktop files are installed from application bundle. "
+                    "Check their Exec= and Icon= entries.",
+                )
+        else:
+            self.warn("no-desktop-files", "No desktop files found.")
+
+    def update_doc_directory(self):
+        found = find_files(self.root, "usr/share/doc/*")
+        if found:
+            self.doc_directory = found[0]
+            if self.doc_directory:
+                self.add_use_flag("doc")
+
+    def update_archives_in_directory(self, directory):
+        found = find_files(self.root + directory + "/", "**/*.gz")
+        for item in found:
+            self.archives_in_doc_directory.append(directory + "/" + item)
+
+    def update_potencial_run_files(self):
+        if self.desktop_files:
+            for desktop_file in self.desktop_files:
+                with open(self.root + desktop_file) as desktop:
+                    lines = desktop.readlines()
+                for line in lines:
+                    if "Exec=" in line:
+                        if '"' in line:
+                            command = line.split('"')[1]
+                        else:
+                            command = (
+                                line.replace("Exec=", "")
+                                .replace("\n", "")
+                                .split(" ")[0]
+                            )
+                        if len(command.split("/")) > 1:
+                            if command[0] == "/":
+                                command = command[1:]
+                            # Bundles are moved to /opt, so absolute paths of
+                            # their .desktop files don't point inside them.
+                            if self.layout == "bundle" and not path.isfile(
+                                self.root + command
+                            ):
+                                continue
+                            self.potencial_run_files.append(command)
+                            if "usr/bin" in command and self.layout == "root":
+                                self.native_bin = command
+            if self.potencial_run_files:
+                return
+
+        patterns = [
+            self.package,
+            self.package.capitalize(),
+            self.package.replace("-desktop", ""),
+            self.package.replace("-desktop", "").capitalize(),
+        ]
+
+        for pattern in patterns:
+            tmp = find_files(self.root, f"**/{pattern}")
+            for item in tmp:
+                if item not in self.potencial_run_files and path.isfile(
+                    self.root + item
+                ):
+                    self.potencial_run_files.append(item)
+                    if "usr/bin" in item and self.layout == "root":
+                        self.native_bin = item
+
+        if not self.native_bin and not self.potencial_run_files:
+            self.warn("no-executable", "No executable files found.")
+
+    def update_wmclass(self):
+        if self.desktop_files:
+            for desktop_file in self.desktop_files:
+                with open(self.root + desktop_file) as desktop:
+                    lines = desktop.readlines()
+                for line in lines:
+                    if "StartupWMClass=" in line:
+                        if '"' in line:
+                            self.wm_class = line.split('"')[1]
+                        else:
+                            self.wm_class = (
+                                line.replace("StartupWMClass=", "")
+                                .replace("\n", "")
+                                .split(" ")[0]
+                            )
+
+    def update_fixes(self):
+        for file in self.database["deprecated-movable"]:
+            found = find_files(self.root, file)
+            if found:
+                self.fixes["move"].append(
+                    (file, self.database["deprecated-movable"][file])
+                )
+        self.fixes["move"].sort()
+
+        for file in self.database["deprecated-removable"]:
+            found = find_files(self.root, file)
+            if found:
+                self.fixes["remove"].append(file)
+
+        self.fixes["remove"] = collapse_paths(self.fixes["remove"])
+
+    def update_shared_libraries(self):
+        libraries = set()
+        for item in find_files(self.root, "**/*.so*"):
+            library = item.split("/")[-1]
+            if fullmatch(r".+\.so(\.\d+)*", library) and path.isfile(self.root + item):
+                libraries.add(library)
+        self.shared_libraries = sorted(libraries)
+
+    def build_src_uri(self):
+        pv = "${PV}"
+        p = "${P}"
+
+        src_uri = []
+        sources = self.get_sources()
+        for arch in sorted(sources):
+            suffix = sources[arch].suffix()
+            url = sources[arch].get_src_uri().replace(self.version, pv)
+            if len(sources) == 1:
+                src_uri.append(f"{url} -> {p}{suffix}")
+            else:
+                keyword = KEYWORDS.get(arch, arch)
+                src_uri.append(f"{keyword}? ( {url} -> {p}-{arch}{suffix} )")
+        return src_uri
+
+    def build_keywords(self):
+        keywords = {KEYWORDS.get(arch, arch) for arch in self.get_architectures()}
+        return ["-*"] + [f"~{keyword}" for keyword in sorted(keywords)]
+
+    def build_src_prepare(self):
+        phase = Phase("src_prepare", default=True)
+
+        if self.archives_in_doc_directory and "doc" in self.use_flags:
+            block = Block("use doc")
+            for archive in sorted(self.archives_in_doc_directory):
+                extracted_location = ".".join(archive.split("/")[-1].split(".")[:-1])
+                target_location = "/".join(archive.split("/")[:-1])
+                block.statements += [
+                    f'unpack "{archive}" || die "unpack failed"',
+                    f'rm -f "{archive}" || die "rm failed"',
+                    f'mv "{extracted_location}" "{target_location}" || die "mv failed"',
+                ]
+            phase.add_group([block])
+
+        for use in sorted(self.unnecessary_files):
+            block = Block(f"use {use}")
+            for f in self.unnecessary_files[use]:
+                flags = "-rf" if path.isdir(self.root + f) else "-f"
+                block.statements.append(f'rm {flags} "{f}" || die "rm failed"')
+            phase.add_group([block])
+
+        phase.add_group(
+            f'mv "{source}" "{target}" || die "mv failed"'
+            for source, target in self.fixes["move"]
+        )
+
+        phase.add_group(
+            f'rm -rf "{fix}" || die "rm failed"' for fix in self.fixes["remove"]
+        )
+
+        if self.options.wm_class:
+            if self.wm_class:
+                phase.add_group(
+                    [
+                        'sed -i "/^StartupWMClass=/{h;s/=.*/=%s/}" "%s" || die "sed failed"'
+                        % (self.options.wm_class, self.desktop_files[0])
+                    ]
+                )
+            else:
+                phase.add_group(
+                    [
+                        f'echo "StartupWMClass={self.options.wm_class}" >> "{self.desktop_files[0]}" || die "echo failed"'
+                    ]
+                )
+        return phase
+
+    def build_src_unpack(self):
+        phase = Phase("src_unpack")
+        phase.add_group(self.unpack_statements)
+        return phase
+
+    def build_src_install(self):
+        phase = Phase("src_install")
+        ed = "${ED}"
+
+        # Application bundles are installed to /opt instead of the root.
+        prefix = f"opt/{self.package}/" if self.layout == "bundle" else ""
+
+        if prefix:
+            phase.add_group(
+                [
+                    f'mkdir -p "{ed}/{prefix}" || die "mkdir failed"',
+                    f'cp -a . "{ed}/{prefix}" || die "cp failed"',
+                ]
+            )
+            phase.add_group(
+                f'domenu "{desktop}" || die "domenu failed"'
+                for desktop in self.desktop_files
+            )
+        else:
+            phase.add_group(['cp -a . "${ED}" || die "cp failed"'])
+
+        if self.doc_directory:
+            phase.add_group(
+                [f'rm -r "{ed}/{prefix}{self.doc_directory}" || die "rm failed"']
+            )
+            phase.add_group(
+                [
+                    Block(
+                        "use doc",
+                        [f'dodoc -r "{self.doc_directory}/"* || die "dodoc failed"'],
+                    )
+                ]
+            )
+
+        for use in sorted(self.unnecessary_files):
+            if use in self.database["use-symlinks"]:
+                block = Block(f"use {use}")
+                for f in self.unnecessary_files[use]:
+                    block.statements.append(
+                        f'dosym "{self.database["use-symlinks"][use]}" "/{prefix}{f}" || die "dosym failed"'
+                    )
+                phase.add_group([block])
+
+        if not self.native_bin and self.potencial_run_files:
+            exe = self.potencial_run_files[0]
+            phase.add_group(
+                [
+                    f'dosym "/{prefix}{exe}" "/usr/bin/{self.package}" || die "dosym failed"'
+                ]
+            )
+
+        return phase
+
+    def build_document(self):
+        """Return EbuildDocument with all variables and phase functions."""
+        document = EbuildDocument(self.name())
+
+        # Dependencies have to be built first, because they add USE flags.
+        rdepend = self.build_dependencies()
+
+        from datetime import date
+
+        document.variables = {
+            "YEAR": date.today().year,
+            "EAPI": self.eapi,
+            "INHERIT": sorted(set(self.inherit)),
+            "DESCRIPTION": self.description,
+            "HOMEPAGE": self.homepage,
+            "SRC_URI": self.build_src_uri(),
+            "LICENSE": self.license,
+            "SLOT": self.slot,
+            "KEYWORDS": self.build_keywords(),
+            "RESTRICT": sorted(self.restrict),
+            "IUSE": sorted(self.use_flags),
+            "RDEPEND": rdepend,
+            "QA_PREBUILT": "*",
+            "S": path.join("${WORKDIR}", self.workdir).rstrip("/"),
+        }
+        document.phases = [
+            self.build_src_unpack(),
+            self.build_src_prepare(),
+            self.build_src_install(),
+        ]
+        document.analysis = {
+            "package": self.package,
+            "version": self.version,
+            "layout": self.layout,
+            "package-dependencies": self.package_dependencies,
+            "library-dependencies": self.library_dependencies,
+            "desktop-files": self.desktop_files,
+            "doc-directory": self.doc_directory,
+            "archives-in-doc-directory": sorted(self.archives_in_doc_directory),
+            "potencial-run-files": self.potencial_run_files,
+            "native-bin": self.native_bin,
+            "wm-class": self.wm_class,
+            "unnecessary-files": dict(sorted(self.unnecessary_files.items())),
+            "fixes": self.fixes,
+            "shared-libraries": self.shared_libraries,
+            "use-flags": sorted(self.use_flags),
+        }
+        return document
@@ -0,0 +1,169 @@
+from contextlib import contextmanager
+from sys import stdout
+from time import perf_counter
+
+verbose = False
+json_output = False
+
+# Output is collected here and written at once by flush(), so parallel
+# runs don't interleave their lines on stdout.
+buffer = []
+
+# Worker processes keep their output in buffer and send it to the parent.
+deferred = False
+
+# Threads of the pipeline collect their output separately, see captured().
+thread_buffers = None
+
+
+class Colors:
+    HEADER = "\033[95m"
+    OKBLUE = "\033[94m"
+    OKGREEN = "\033[92m"
+    WARNING = "\033[93m"
+    FAIL = "\033[91m"
+    ENDC = "\033[0m"
+    BOLD = "\033[1m"
+    UNDERLINE = "\033[4m"
+
+
+def flush():
+    """Write buffered output to stdout."""
+    # Capturing threads leave writing to the main thread.
+    if hasattr(thread_buffers, "buffer"):
+        return
+    if buffer and not deferred:
+        # Pipeline threads may append to the buffer in the meantime.
+        count = len(buffer)
+        stdout.write("".join(buffer[:count]))
+        stdout.flush()
+        del buffer[:count]
+
+
+def take_buffer():
+    """Return buffered output as text and clear the buffer."""
+    count = len(buffer)
+    text = "".join(buffer[:count])
+    del buffer[:count]
+    return text
+
+
+def append(text):
+    """Add text to buffer of current thread."""
+    getattr(thread_buffers, "buffer", buffer).append(text)
+
+
+@contextmanager
+def captured():
+    """Collect output of current thread and add it to buffer at once."""
+    global thread_buffers
+
+    if thread_buffers is None:
+        from threading import local
+
+        thread_buffers = local()
+    thread_buffers.buffer = []
+    try:
+        yield
+    finally:
+        buffer.append("".join(thread_buffers.buffer))
+        del thread_buffers.buffer
+
+
+def emit(event, **fields):
+    """Buffer newline-delimited JSON event if --json flag is present."""
+    if json_output:
+        from json import dumps
+
+        append(dumps({"event": event, **fields}) + "\n")
+
+
+def emit_now(event, **fields):
+    """Write JSON event at once, its single line can't break other output."""
+    if json_output and deferred:
+        emit(event, **fields)
+    elif json_output:
+        from json import dumps
+
+        # Buffered events come first, unless they are captured by the thread.
+        flush()
+        stdout.write(dumps({"event": event, **fields}) + "\n")
+        stdout.flush()
+
+
+def echo(string="", end="\n"):
+    """Print function for human readable output, silent with --json flag."""
+    if not json_output:
+        append(string + end)
+
+
+def verbose_print(string):
+    """Print function that prints only if --verbose flag is present."""
+    if verbose:
+        echo(string)
+
+
+def print_warning(string):
+    """Print function that prints in Colors.WARNING colors."""
+    echo(Colors.WARNING + string + Colors.ENDC)
+
+
+def print_bold(string):
+    """Print function that prints bold text."""
+    echo(Colors.BOLD + string + Colors.ENDC)
+
+
+def print_ok(string):
+    """Print function that prints green text."""
+    echo(Colors.OKGREEN + string + Colors.ENDC)
+
+
+def print_error(message):
+    """Report error as text or error event and write it immediately."""
+    print_warning(f"[error] {message}")
+    emit("error", message=message)
+    flush()
+
+
+def report_warnings(warnings):
+    """Report warnings as list of text lines or as warning events."""
+    if warnings:
+        print_warning("\nThings that may require your attention:\n")
+    for warning in warnings:
+        print_bold(warning["message"])
+        emit("warning", **warning)
+
+
+def download_bar(filename):
+    """Return wget progress callback, which reports every 10 percent as event.
+
+    Progress events are written right away instead of at the end of the phase.
+    """
+    reported = []
+
+    def bar(current, total, _):
+        step = current * 10 // total if total > 0 else 0
+        if step not in reported:
+            reported.append(step)
+            emit_now("download-progress", file=filename, bytes=current, total=total)
+        return ""
+
+    return bar
+
+
+@contextmanager
+def phase(name, live=False, **fields):
+    """Report start and end of phase with its duration and flush the output.
+
+    Live phase writes its events at once, so they stay in order with
+    events written at once inside it, even in captured output.
+    """
+    report = emit_now if live else emit
+    report("phase-start", phase=name, **fields)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        seconds = round(perf_counter() - start, 3)
+        report("phase-end", phase=name, seconds=seconds, **fields)
+        flush()
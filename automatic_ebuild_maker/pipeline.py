@@ -0,0 +1,210 @@
+from asyncio import Queue, gather, get_running_loop, run, to_thread
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter
+
+from . import output
+from .output import emit, print_error, take_buffer, verbose_print
+
+# Options and database of worker process, set once by init_worker().
+worker_options = None
+worker_database = None
+
+
+def init_worker(verbose, json_output, options=None, database=None):
+    """Set up output and shared data of worker process."""
+    global worker_options, worker_database
+
+    output.verbose = verbose
+    output.json_output = json_output
+    output.deferred = True
+    worker_options = options
+    worker_database = database
+
+
+def analyse_package(input_files):
+    """Extract and analyse one package in worker process.
+
+    Return Ebuild or None if the analysis failed and output of the worker.
+    """
+    from .ebuild import Ebuild
+    from .output import phase
+
+    ebuild = None
+    try:
+        with phase("analysis", file=input_files[0].filename):
+            ebuild = Ebuild(
+                sources=input_files, options=worker_options, database=worker_database
+            )
+    except Exception as error:
+        print_error(f"Analysis of {input_files[0].filename} failed: {error}")
+    return ebuild, take_buffer()
+
+
+def captured_call(function, *arguments):
+    """Call function in thread and add its output to the buffer at once."""
+    with output.captured():
+        function(*arguments)
+
+
+def item_name(item):
+    """Return name of pipeline item for messages, list of files or Ebuild."""
+    if isinstance(item, list):
+        return item[0].filename
+    return item.package
+
+
+class Stage:
+    """Pipeline stage with bounded input queue and its statistics"""
+
+    def __init__(self, name, jobs):
+        self.name = name
+        self.jobs = jobs
+        # Full queue blocks the previous stage, so fast stages don't run ahead.
+        self.queue = Queue(maxsize=jobs * 2)
+        self.pending = 0
+        self.done = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.max_depth = 0
+        self.started = None
+        self.finished = None
+
+    async def put(self, item):
+        await self.queue.put(item)
+        self.pending += 1
+        self.max_depth = max(self.max_depth, self.pending)
+
+    async def close(self):
+        """Tell every worker of the stage there are no more items."""
+        for _ in range(self.jobs):
+            await self.queue.put(None)
+
+    def seconds(self):
+        if self.started is None:
+            return 0.0
+        return self.finished - self.started
+
+    def summary(self):
+        seconds = self.seconds()
+        return {
+            "stage": self.name,
+            "jobs": self.jobs,
+            "items": self.done,
+            "failed": self.failed,
+            "seconds": round(seconds, 3),
+            "per-second": round(self.done / seconds, 3) if seconds else 0.0,
+            "busy-seconds": round(self.busy, 3),
+            "max-queue": self.max_depth,
+        }
+
+    async def run(self, work, next_stage=None):
+        """Process queued items with jobs workers and pass results to next stage."""
+
+        async def worker():
+            while True:
+                item = await self.queue.get()
+                if item is None:
+                    return
+                self.pending -= 1
+                start = perf_counter()
+                if self.started is None:
+                    self.started = start
+                try:
+                    result = await work(item)
+                except Exception as error:
+                    print_error(
+                        f"Stage {self.name} of {item_name(item)} failed: {error}"
+                    )
+                    result = None
+                self.finished = perf_counter()
+                self.busy += self.finished - start
+                self.done += 1
+                emit(
+                    "stage-progress",
+                    stage=self.name,
+                    done=self.done,
+                    queue=self.pending,
+                    seconds=round(self.finished - start, 3),
+                )
+                if result is None:
+                    self.failed += 1
+                elif next_stage:
+                    await next_stage.put(result)
+
+        await gather(*(worker() for _ in range(self.jobs)))
+        if next_stage:
+            await next_stage.close()
+
+
+async def pipeline(packages, options, database, write):
+    fetch = Stage("fetch", options.download_jobs)
+    analyse = Stage("analyse", options.jobs)
+    writer = Stage("write", options.write_jobs)
+
+    async def fetch_package(input_files):
+        # Only the first file of package is extracted, see Ebuild.
+        source = input_files[0]
+        if not (source.local or source.is_extracted() or source.is_downloaded()):
+            await to_thread(captured_call, source.download, False)
+        output.flush()
+        return input_files
+
+    loop = get_running_loop()
+    # Forking the process running threads of other stages could copy held locks.
+    with ProcessPoolExecutor(
+        options.jobs,
+        mp_context=get_context("forkserver"),
+        initializer=init_worker,
+        initargs=(output.verbose, output.json_output, options, database),
+    ) as pool:
+
+        async def analyse_files(input_files):
+            ebuild, text = await loop.run_in_executor(
+                pool, analyse_package, input_files
+            )
+            output.buffer.append(text)
+            output.flush()
+            return ebuild
+
+        async def write_files(ebuild):
+            await to_thread(captured_call, write, ebuild, options, database)
+            output.flush()
+            return ebuild
+
+        async def feed():
+            for input_files in packages:
+                await fetch.put(input_files)
+            await fetch.close()
+
+        await gather(
+            feed(),
+            fetch.run(fetch_package, analyse),
+            analyse.run(analyse_files, writer),
+            writer.run(write_files),
+        )
+
+    return [fetch, analyse, writer]
+
+
+def run_pipeline(packages, options, database, write):
+    """Download, analyse and write packages in overlapping stages.
+
+    Downloads run in threads, extraction and analysis in processes and
+    analysed packages are passed to write(ebuild, options, database).
+    Return number of packages, which failed.
+    """
+    stages = run(pipeline(packages, options, database, write))
+
+    verbose_print("\n[ok] Pipeline stages:")
+    for stage in stages:
+        summary = stage.summary()
+        emit("stage-summary", **summary)
+        verbose_print(
+            f'   - {summary["stage"]}: {summary["items"]} packages in '
+            f'{summary["seconds"]} s ({summary["per-second"]}/s), '
+            f'busy {summary["busy-seconds"]} s with {summary["jobs"]} jobs, '
+            f'queue up to {summary["max-queue"]}'
+        )
+    output.flush()
+    return sum(stage.failed for stage in stages)
@@ -0,0 +1,128 @@
+from fnmatch import fnmatch
+from glob import glob
+from json import dump, load
+from os import makedirs, path
+
+from .constants import ANALYSIS_DIR
+from .output import echo, emit, print_bold, print_warning
+from .utils import parse_dependency
+
+REPORT_SECTIONS = {
+    "dependencies": "Dependencies without Gentoo alternative",
+    "bundled-libraries": "Bundled or required libraries not found in database",
+    "use-descriptions": "USE flags without description",
+}
+
+
+def save_analysis(analysis, analysis_directory=ANALYSIS_DIR):
+    """Save analysis of one package, so reports don't need the package files."""
+    makedirs(analysis_directory, exist_ok=True)
+    name = f'{analysis["package"]}-{analysis["version"]}.json'.replace("/", "-")
+    with open(path.join(analysis_directory, name), "w") as analysis_file:
+        dump(analysis, analysis_file, indent=2, sort_keys=True)
+
+
+def load_analyses(analysis_directory=ANALYSIS_DIR):
+    analyses = []
+    for analysis_file in sorted(glob(path.join(analysis_directory, "*.json"))):
+        with open(analysis_file) as file:
+            analyses.append(load(file))
+    return analyses
+
+
+def dependency_names(dependency):
+    """Return names of all alternatives of dependency.
+
+    Analyses of older runs contain raw .deb dependencies with versions.
+    """
+    if isinstance(dependency, str):
+        dependency = [dependency]
+    names = []
+    for alternative in dependency:
+        parsed = parse_dependency(alternative)
+        names += parsed if isinstance(parsed, list) else [parsed]
+    return names
+
+
+def unmapped_dependencies(dependencies, database):
+    """Yield names of dependencies without Gentoo alternative in database.
+
+    Alternatives are reported only when none of them is mapped.
+    """
+    mapped = set(database.get("dependencies", {}))
+    mapped.update(database.get("dependencies-optional", {}))
+
+    for dependency in dependencies:
+        names = dependency_names(dependency)
+        if not any(name in mapped for name in names):
+            yield from names
+
+
+def build_report(analyses, database):
+    """Return missing database entries ranked by number of packages using them.
+
+    Cached analyses are compared with the current database, so entries added
+    since the packages were processed are not reported anymore.
+    """
+    found = {section: {} for section in REPORT_SECTIONS}
+    patterns = [
+        pattern.split("/")[-1]
+        for files in database.get("unnecessary-files", {}).values()
+        for pattern in files
+    ]
+
+    for analysis in analyses:
+        package = analysis["package"]
+
+        for dependency in unmapped_dependencies(
+            analysis.get("package-dependencies", []), database
+        ):
+            found["dependencies"].setdefault(dependency, set()).add(package)
+
+        for library in analysis.get("shared-libraries", []):
+            if library not in database.get("bundled-libraries", {}) and not any(
+                fnmatch(library, pattern) for pattern in patterns
+            ):
+                found["bundled-libraries"].setdefault(library, set()).add(package)
+
+        # Sonames required by .rpm packages are mapped by the same section.
+        for library in analysis.get("library-dependencies", []):
+            if library not in database.get("bundled-libraries", {}):
+                found["bundled-libraries"].setdefault(library, set()).add(package)
+
+        for use in analysis.get("use-flags", []):
+            if use not in database.get("use-descriptions", {}):
+                found["use-descriptions"].setdefault(use, set()).add(package)
+
+    report = {}
+    for section, entries in found.items():
+        report[section] = [
+            {"name": name, "count": len(packages), "packages": sorted(packages)}
+            for name, packages in sorted(
+                entries.items(), key=lambda entry: (-len(entry[1]), entry[0])
+            )
+        ]
+    return report
+
+
+def patch_skeleton(report):
+    """Return database layer with reported entries to be filled in."""
+    return {
+        section: {entry["name"]: "" for entry in entries}
+        for section, entries in report.items()
+        if entries
+    }
+
+
+def print_report(report, packages_count, limit=5):
+    print_bold(f"\nMissing database entries in {packages_count} analysed packages:")
+    for section, entries in report.items():
+        emit("report", section=section, entries=entries)
+        if not entries:
+            continue
+        print_warning(f"\n{REPORT_SECTIONS[section]}:\n")
+        for entry in entries:
+            packages = ", ".join(entry["packages"][:limit])
+            if entry["count"] > limit:
+                packages += ", ..."
+            echo(f'{entry["count"]:>5}  {entry["name"]}  ({packages})')
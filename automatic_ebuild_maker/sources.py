@@ -0,0 +1,564 @@
+from contextlib import contextmanager
+from os import chmod, listdir, makedirs, path
+from re import compile, fullmatch, sub
+
+from .constants import (
+    ARCHITECTURES,
+    CACHE_DIR,
+    RPM_LEAD_MAGIC,
+    RPM_TAGS,
+    STORE_DIRNAME,
+)
+from . import output
+from .output import echo, phase, print_bold
+from .utils import (
+    extract_cpio,
+    file_key,
+    find_files,
+    local_path,
+    parse_filename,
+    read_desktop_entry,
+    read_rpm_header,
+)
+
+
+class MappedMember:
+    """Read-only file object over one member of memory-mapped archive"""
+
+    def __init__(self, mapped, offset, size):
+        self.mapped = mapped
+        self.offset = offset
+        self.size = size
+        self.position = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0 or self.position + size > self.size:
+            size = self.size - self.position
+        start = self.offset + self.position
+        self.position += size
+        return self.mapped[start : start + size]
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.size
+        self.position = min(max(offset, 0), self.size)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+
+class Source:
+    """Class representing input package file"""
+
+    suffixes = []
+    eclass = ""
+    layout = "root"
+
+    url = ""
+    src_uri = ""
+    cache_dir = ""
+    location = ""
+    filename = ""
+    architecture = ""
+    subdir = ""
+    store_location = ""
+    local = False
+
+    def __init__(self, url, cache_directory=CACHE_DIR, arch="", src_uri=""):
+        if url:
+            self.url = url
+            self.cache_dir = cache_directory
+            self.filename = url.split("/")[-1]
+            self.dirname = self.filename.replace(".", "-")
+
+            # Local files are read in place and never copied to the cache.
+            # Files with the same name in different places or replaced ones
+            # get their own extraction directory.
+            file_path = local_path(url)
+            if file_path:
+                self.local = True
+                self.location = file_path
+                self.filename = path.basename(file_path)
+                self.dirname = "-".join(
+                    [self.filename.replace(".", "-"), file_key(file_path)]
+                )
+
+            self.extract_location = self.cache_dir + self.dirname
+            self.store_location = self.cache_dir + STORE_DIRNAME
+        self.src_uri = src_uri or ("" if self.local else url)
+        self.architecture = arch
+
+    def suffix(self):
+        for suffix in self.suffixes:
+            if self.filename.endswith(suffix):
+                return suffix
+        return "." + self.filename.split(".")[-1]
+
+    def get_src_uri(self):
+        """Return upstream URL with @ARCH@ and @FILENAME@ filled in."""
+        return self.src_uri.replace("@ARCH@", self.architecture).replace(
+            "@FILENAME@", self.filename
+        )
+
+    def get_root(self):
+        """Return directory with extracted files of the package."""
+        return path.join(self.extract_location, "data", self.subdir, "")
+
+    def is_downloaded(self):
+        if not self.filename:
+            return False
+        if self.local:
+            return path.isfile(self.location)
+        return path.isfile(self.cache_dir + self.filename)
+
+    def download(self, progress=True):
+        from wget import bar_adaptive, download
+
+        if self.filename and not self.local:
+            print_bold(
+                f"\nDownloading target file to {self.cache_dir + self.filename}\n"
+            )
+            echo(f"{self.url}\n")
+            if output.json_output:
+                bar = output.download_bar(self.filename)
+            elif progress:
+                bar = bar_adaptive
+            else:
+                bar = None
+            # Progress events are written at once, so the phase has to be too.
+            with phase("download", live=True, file=self.filename, url=self.url):
+                # wget writes its progress bar directly to stdout.
+                output.flush()
+                self.location = download(
+                    self.url, self.cache_dir + self.filename, bar=bar
+                )
+            echo("\n")
+
+    def is_extracted(self):
+        return path.isdir(self.extract_location)
+
+    @contextmanager
+    def open_mapped(self):
+        """Return read-only memory map of the package file."""
+        from mmap import mmap, ACCESS_READ
+
+        with open(self.location, "rb") as source_file, mmap(
+            source_file.fileno(), 0, access=ACCESS_READ
+        ) as mapped:
+            yield mapped
+
+    def read_package_info(self):
+        """Return package name, version and architecture without extracting the file."""
+        name, version, architecture = parse_filename(
+            self.filename[: -len(self.suffix())]
+        )
+        return {"Package": name, "Version": version, "Architecture": architecture}
+
+    def extract(self):
+        if self.local:
+            print_bold(f"\nReading local file {self.filename}.")
+            echo(f"{self.location}\n")
+        elif self.is_downloaded():
+            print_bold(f"\nFile {self.filename} already downloaded in cache.")
+            self.location = self.cache_dir + self.filename
+            echo(f"{self.location}\n")
+        else:
+            self.download()
+
+        with self.open_mapped() as mapped, phase("extract", file=self.filename):
+            try:
+                self.unpack(mapped)
+            except BaseException:
+                # Partial tree would be taken for extracted package next time.
+                from shutil import rmtree
+
+                rmtree(self.extract_location, ignore_errors=True)
+                raise
+
+    def unpack(self, mapped):
+        """Extract files of memory-mapped archive to data/ in one pass."""
+        raise NotImplementedError
+
+    def extract_tar(self, fileobj, destination):
+        """Extract tarball from seekable fileobj.
+
+        Regular files are hardlinks to content-addressed blobs in the store.
+        Truncated tarball raises, unlike in stream mode, where it looks complete.
+        """
+        import tarfile
+
+        from .store import store_file
+
+        directories = []
+        with tarfile.open(fileobj=fileobj, mode="r:*") as tar_file:
+            for member in tar_file:
+                name = path.normpath(member.name).lstrip("/")
+                if name == "." or name.split("/")[0] == "..":
+                    continue
+                if member.isfile():
+                    store_file(
+                        tar_file.extractfile(member),
+                        member.size,
+                        path.join(destination, name),
+                        member.mode,
+                        self.store_location,
+                    )
+                elif member.isdir():
+                    # Permissions are set at the end, they could block writing content.
+                    makedirs(path.join(destination, name), exist_ok=True)
+                    directories.append((name, member.mode))
+                else:
+                    tar_file.extract(member, destination)
+            # Decompressor raises on missing end of stream only when it reaches it.
+            while tar_file.fileobj.read(1 << 20):
+                pass
+
+        for name, mode in reversed(directories):
+            chmod(path.join(destination, name), mode & 0o7777)
+
+    def write_control_data(self, data):
+        from json import dump
+
+        makedirs(self.extract_location + "/control", exist_ok=True)
+        with open(self.extract_location + "/control/metadata.json", "w") as file:
+            dump(data, file, indent=2)
+
+    def read_control_data(self):
+        from json import load
+
+        with open(self.extract_location + "/control/metadata.json") as file:
+            return load(file)
+
+    def get_control_data(self):
+        if self.is_extracted():
+            print_bold(f"\nFile {self.filename} already extracted in cache.")
+            echo(f"{self.extract_location}\n")
+        else:
+            self.extract()
+
+        data = self.read_control_data()
+
+        if data.get("Subdirectory"):
+            self.subdir = data["Subdirectory"]
+
+        if data.get("Architecture"):
+            self.architecture = data["Architecture"]
+
+        return data
+
+    def get_workdir(self, version):
+        """Return directory of unpacked files relative to ${WORKDIR}."""
+        return self.subdir.replace(version, "${PV}") if version else self.subdir
+
+    def unpack_statements(self):
+        """Return statements of src_unpack() or empty list for default one."""
+        return []
+
+
+class Deb(Source):
+    """Class representing .deb file"""
+
+    suffixes = [".deb"]
+    eclass = "unpacker"
+
+    def unpack(self, mapped):
+        import unix_ar
+
+        ar_file = unix_ar.open(mapped)
+
+        for info in ar_file.infolist():
+            archive = info.name.decode("utf-8")
+            if ".tar.gz" in archive or ".tar.xz" in archive:
+                echo(f"Extracting {archive}", end=" ")
+                folder = archive.split(".")[0]
+                if path.isdir(f"{self.extract_location}/{folder}"):
+                    echo("[already extracted]")
+                else:
+                    tarball = MappedMember(mapped, info.offset + 60, info.size)
+                    self.extract_tar(tarball, f"{self.extract_location}/{folder}")
+                    echo("[done]")
+
+    def read_package_info(self):
+        import tarfile
+        import unix_ar
+
+        data = {}
+        with self.open_mapped() as mapped:
+            for info in unix_ar.open(mapped).infolist():
+                if not info.name.decode("utf-8").startswith("control.tar"):
+                    continue
+                control = MappedMember(mapped, info.offset + 60, info.size)
+                with tarfile.open(fileobj=control, mode="r|*") as tar_file:
+                    for member in tar_file:
+                        if path.normpath(member.name) != "control":
+                            continue
+                        content = tar_file.extractfile(member).read()
+                        for line in content.decode("utf-8").splitlines():
+                            key, _, value = line.partition(": ")
+                            if key in ["Package", "Version", "Architecture"]:
+                                data[key] = value
+                        return data
+        return data
+
+    def read_control_data(self):
+        data = {}
+        with open(self.extract_location + "/control/control") as control_file:
+            lines = control_file.readlines()
+
+            next_item = ""
+            buffer = []
+
+            for line in lines:
+                line = line.replace("\n", "")
+                if fullmatch(compile(r"\S+:\s.+"), line):
+                    if next_item:
+                        data[next_item] = "".join(buffer)
+                        data[next_item + " lines"] = buffer
+                        next_item = ""
+                        buffer = []
+                    key, value = line.split(": ", 1)
+                    data[key] = value
+                elif fullmatch(compile(r"\S+:\s"), line):
+                    next_item = line.replace(": ", "")
+                else:
+                    buffer.append(line.replace("  ", ""))
+
+            if next_item:
+                data[next_item] = "".join(buffer)
+                data[next_item + " lines"] = buffer
+
+        dependencies = []
+        if "Depends" in data:
+            dependencies += data["Depends"].replace(" ", "").split(",")
+        if "Recommends" in data:
+            dependencies += data["Recommends"].replace(" ", "").split(",")
+            data.pop("Recommends")
+        if "Suggests" in data:
+            dependencies += data["Suggests"].replace(" ", "").split(",")
+            data.pop("Suggests")
+        data["Depends"] = dependencies
+
+        for i in range(len(dependencies)):
+            if dependencies[i][-1] == " ":
+                dependencies[i] = dependencies[i][:-1]
+
+        return data
+
+
+class Rpm(Source):
+    """Class representing .rpm file"""
+
+    suffixes = [".rpm"]
+    eclass = "rpm"
+
+    def read_tags(self, mapped):
+        """Return tags of main header and offset of the payload."""
+        if mapped[:4] != RPM_LEAD_MAGIC:
+            raise ValueError(f"{self.filename} is not a .rpm file")
+
+        # Lead is followed by signature header padded to 8 bytes and main header.
+        _, offset = read_rpm_header(mapped, 96)
+        offset += -offset % 8
+        return read_rpm_header(mapped, offset)
+
+    def read_package_info(self):
+        with self.open_mapped() as mapped:
+            tags, _ = self.read_tags(mapped)
+        return {
+            "Package": tags.get(RPM_TAGS["name"], ""),
+            "Version": tags.get(RPM_TAGS["version"], ""),
+            "Architecture": ARCHITECTURES.get(tags.get(RPM_TAGS["arch"]), ""),
+        }
+
+    def unpack(self, mapped):
+        tags, offset = self.read_tags(mapped)
+
+        echo(f"Extracting payload of {self.filename}", end=" ")
+
+        payload = MappedMember(mapped, offset, len(mapped) - offset)
+        compressor = tags.get(RPM_TAGS["compressor"], "gzip")
+        if compressor == "gzip":
+            from gzip import GzipFile
+
+            stream = GzipFile(fileobj=payload)
+        elif compressor in ["xz", "lzma"]:
+            from lzma import LZMAFile
+
+            stream = LZMAFile(payload)
+        elif compressor == "bzip2":
+            from bz2 import BZ2File
+
+            stream = BZ2File(payload)
+        elif compressor == "zstd":
+            try:
+                from zstandard import ZstdDecompressor
+            except ImportError:
+                raise ValueError("zstandard module is required for zstd payloads")
+            stream = ZstdDecompressor().stream_reader(payload)
+        else:
+            raise ValueError(f"Unsupported .rpm payload compression {compressor}")
+
+        extract_cpio(stream, self.extract_location + "/data", self.store_location)
+        echo("[done]")
+
+        # Libraries are required by soname, which isn't a package name.
+        dependencies, libraries = [], []
+        for requirement in tags.get(RPM_TAGS["requires"], []):
+            if requirement.startswith(("/", "rpmlib(", "config(")):
+                continue
+            requirement = sub(r"\(.*\)$", "", requirement)
+            if fullmatch(r".+\.so(\.\d+)*", requirement):
+                if requirement not in libraries:
+                    libraries.append(requirement)
+            elif requirement not in dependencies:
+                dependencies.append(requirement)
+
+        description = tags.get(RPM_TAGS["description"], "")
+        self.write_control_data(
+            {
+                "Package": tags.get(RPM_TAGS["name"], ""),
+                "Version": tags.get(RPM_TAGS["version"], ""),
+                "Architecture": ARCHITECTURES.get(tags.get(RPM_TAGS["arch"]), ""),
+                "Description": tags.get(RPM_TAGS["summary"], ""),
+                "Description lines": description.splitlines(),
+                "Homepage": tags.get(RPM_TAGS["url"], ""),
+                "License": tags.get(RPM_TAGS["license"], ""),
+                "Depends": dependencies,
+                "Depends libraries": libraries,
+            }
+        )
+
+
+class Tarball(Source):
+    """Class representing .tar.* file with application directory"""
+
+    suffixes = [".tar.gz", ".tar.xz", ".tar.bz2", ".tgz"]
+    layout = "bundle"
+
+    def unpack(self, mapped):
+        echo(f"Extracting {self.filename}", end=" ")
+        data_location = self.extract_location + "/data"
+        self.extract_tar(MappedMember(mapped, 0, len(mapped)), data_location)
+        echo("[done]")
+
+        # Tarballs usually contain one top-level directory with the application.
+        content = listdir(data_location)
+        if len(content) == 1 and path.isdir(path.join(data_location, content[0])):
+            self.subdir = content[0]
+
+        self.write_control_data(bundle_control_data(self))
+
+
+class AppImage(Source):
+    """Class representing .AppImage file"""
+
+    suffixes = [".AppImage", ".appimage"]
+    layout = "bundle"
+
+    def unpack(self, mapped):
+        # Squashfs image is appended right after the ELF runtime.
+        if mapped[:4] != b"\x7fELF":
+            raise ValueError(f"{self.filename} is not an AppImage")
+        elf_64 = mapped[4] == 2
+        if elf_64:
+            sh_offset = int.from_bytes(mapped[40:48], "little")
+            sh_entsize = int.from_bytes(mapped[58:60], "little")
+            sh_num = int.from_bytes(mapped[60:62], "little")
+        else:
+            sh_offset = int.from_bytes(mapped[32:36], "little")
+            sh_entsize = int.from_bytes(mapped[46:48], "little")
+            sh_num = int.from_bytes(mapped[48:50], "little")
+        offset = sh_offset + sh_entsize * sh_num
+        if mapped[offset : offset + 4] != b"hsqs":
+            offset = mapped.find(b"hsqs", offset)
+            if offset < 0:
+                raise ValueError(f"Squashfs image not found in {self.filename}")
+
+        from subprocess import DEVNULL, CalledProcessError, run
+
+        from .store import store_tree
+
+        echo(f"Extracting squashfs image of {self.filename}", end=" ")
+        try:
+            run(
+                [
+                    "unsquashfs",
+                    "-quiet",
+                    "-no-progress",
+                    "-offset",
+                    str(offset),
+                    "-dest",
+                    self.extract_location + "/data",
+                    self.location,
+                ],
+                check=True,
+                stdout=DEVNULL,
+            )
+        except FileNotFoundError:
+            raise ValueError("unsquashfs (squashfs-tools) is required for AppImages")
+        except CalledProcessError as error:
+            raise ValueError(
+                f"unsquashfs failed to extract {self.filename} "
+                f"(exit status {error.returncode})"
+            )
+        store_tree(self.extract_location + "/data", self.store_location)
+        echo("[done]")
+
+        self.write_control_data(bundle_control_data(self))
+
+    def unpack_statements(self):
+        return [
+            'cp "${DISTDIR}/${A}" "${WORKDIR}" || die "cp failed"',
+            'chmod +x "${A}" || die "chmod failed"',
+            '"./${A}" --appimage-extract > /dev/null || die "extract failed"',
+            'rm -f "${A}" || die "rm failed"',
+        ]
+
+    def get_workdir(self, _):
+        return "squashfs-root"
+
+
+SOURCE_TYPES = [Deb, Rpm, Tarball, AppImage]
+
+
+def source_type(filename):
+    """Return Source subclass handling given file or None if not supported."""
+    for source_class in SOURCE_TYPES:
+        if filename.endswith(tuple(source_class.suffixes)):
+            return source_class
+    return None
+
+
+def bundle_control_data(source):
+    """Return control data of application bundle from its file name and .desktop file."""
+    name, version, architecture = parse_filename(
+        source.filename[: -len(source.suffix())]
+    )
+    data = {"Package": name, "Depends": [], "Subdirectory": source.subdir}
+
+    root = source.get_root()
+    desktop_files = find_files(root, "**/*.desktop")
+    desktop_files.sort(key=lambda f: (f.count("/"), f))
+    for desktop_file in desktop_files:
+        if path.isfile(root + desktop_file):
+            entry = read_desktop_entry(root + desktop_file)
+            if entry.get("Comment"):
+                data["Description"] = entry["Comment"]
+            if not version:
+                version = entry.get("X-AppImage-Version", "")
+            break
+
+    if version:
+        data["Version"] = version
+    if architecture:
+        data["Architecture"] = architecture
+    return data
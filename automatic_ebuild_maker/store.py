@@ -0,0 +1,132 @@
+from hashlib import sha256
+from os import chmod, link, lstat, makedirs, path, remove, replace, walk
+from shutil import copy2
+from tempfile import NamedTemporaryFile
+from time import time
+
+from .utils import read_exactly
+
+# Files up to this size are hashed in memory, bigger ones in temporary file.
+MEMORY_LIMIT = 1 << 22
+
+# Files being written are kept here, out of reach of garbage collection.
+TEMPORARY_DIRNAME = "tmp"
+
+
+def blob_path(store, digest, mode):
+    """Return path of blob with given content hash and permissions."""
+    return path.join(store, digest[:2], f"{digest[2:]}-{mode:o}")
+
+
+def link_blob(blob, target):
+    """Replace target with hardlink to blob, copy it if it can't be linked.
+
+    Return False if the blob doesn't exist anymore.
+    """
+    temporary = f"{target}.store-link"
+    try:
+        link(blob, temporary)
+    except FileNotFoundError:
+        return False
+    except OSError:
+        # Different filesystem or too many links of one blob.
+        try:
+            copy2(blob, temporary)
+        except FileNotFoundError:
+            return False
+    replace(temporary, target)
+    return True
+
+
+def store_file(stream, size, target, mode, store):
+    """Write file read from stream to target as hardlink to content-addressed blob.
+
+    Blobs are named by sha256 of their content and permissions, so files shared
+    by versions and architectures of a package are stored only once.
+    """
+    mode &= 0o7777
+    temporary_directory = path.join(store, TEMPORARY_DIRNAME)
+    makedirs(temporary_directory, exist_ok=True)
+
+    temporary = None
+    if size <= MEMORY_LIMIT:
+        content = read_exactly(stream, size)
+        digest = sha256(content).hexdigest()
+    else:
+        hash_object = sha256()
+        with NamedTemporaryFile(dir=temporary_directory, delete=False) as file:
+            while size:
+                chunk = read_exactly(stream, min(size, 1 << 20))
+                hash_object.update(chunk)
+                file.write(chunk)
+                size -= len(chunk)
+        temporary = file.name
+        digest = hash_object.hexdigest()
+
+    blob = blob_path(store, digest, mode)
+    makedirs(path.dirname(target), exist_ok=True)
+
+    # Blob may be missing or removed by garbage collection in the meantime.
+    if not link_blob(blob, target):
+        if temporary is None:
+            with NamedTemporaryFile(dir=temporary_directory, delete=False) as file:
+                file.write(content)
+            temporary = file.name
+        chmod(temporary, mode)
+        # Target is linked first, so the new blob is never seen unused.
+        link_blob(temporary, target)
+        makedirs(path.dirname(blob), exist_ok=True)
+        replace(temporary, blob)
+    elif temporary:
+        remove(temporary)
+
+
+def store_tree(root, store):
+    """Move regular files of already extracted tree to the store."""
+    for directory, _, files in walk(root):
+        for name in files:
+            target = path.join(directory, name)
+            if path.islink(target):
+                continue
+            status = lstat(target)
+            with open(target, "rb") as file:
+                store_file(file, status.st_size, target, status.st_mode, store)
+
+
+def collect_garbage(store):
+    """Remove blobs not linked from any extracted package.
+
+    Return number of removed blobs and freed bytes.
+    """
+    removed, freed = 0, 0
+    for directory, directories, files in walk(store):
+        if path.normpath(directory) == path.normpath(store):
+            directories[:] = [d for d in directories if d != TEMPORARY_DIRNAME]
+        for name in files:
+            blob = path.join(directory, name)
+            try:
+                status = lstat(blob)
+                # Blobs with only the store link left aren't used by any package.
+                if status.st_nlink == 1:
+                    remove(blob)
+                    removed += 1
+                    freed += status.st_size
+            except FileNotFoundError:
+                # Removed by another garbage collection.
+                continue
+
+    # Temporary files of interrupted extractions, running ones are newer.
+    temporary_directory = path.join(store, TEMPORARY_DIRNAME)
+    for directory, _, files in walk(temporary_directory):
+        for name in files:
+            temporary = path.join(directory, name)
+            try:
+                status = lstat(temporary)
+                if status.st_mtime < time() - 24 * 60 * 60:
+                    remove(temporary)
+                    removed += 1
+                    freed += status.st_size
+            except FileNotFoundError:
+                # Moved to the store by running extraction.
+                continue
+    return removed, freed
@@ -0,0 +1,209 @@
+from os import link, makedirs, path, stat, symlink
+from re import search, split, sub
+from stat import S_ISDIR, S_ISLNK, S_ISREG
+
+from .constants import ARCHITECTURES, RPM_HEADER_MAGIC
+
+
+def local_path(url):
+    """Return path of local input file or empty string for remote URL."""
+    if url.startswith("file://"):
+        from urllib.parse import unquote, urlparse
+
+        parsed = urlparse(url)
+        if parsed.netloc not in ["", "localhost"]:
+            return ""
+        return unquote(parsed.path)
+    if "://" in url:
+        return ""
+    return path.abspath(path.expanduser(url))
+
+
+def file_key(file_path):
+    """Return short key of local file, which changes when the file is replaced."""
+    from hashlib import sha256
+
+    try:
+        status = stat(file_path)
+    except OSError:
+        return ""
+    identity = f"{path.realpath(file_path)}:{status.st_size}:{status.st_mtime_ns}"
+    return sha256(identity.encode("utf-8")).hexdigest()[:12]
+
+
+def parse_filename(stem):
+    """Return package name, version and architecture guessed from file name."""
+    architecture = ""
+    match = search(
+        r"(?<![a-z0-9])(%s)(?![a-z0-9])" % "|".join(ARCHITECTURES), stem.lower()
+    )
+    if match:
+        architecture = ARCHITECTURES[match.group(1)]
+
+    match = search(r"[-_]v?(\d+(?:\.\d+)+)", stem)
+    if match:
+        return (
+            stem[: match.start()].lower().replace("_", "-"),
+            match.group(1),
+            architecture,
+        )
+    return stem.lower().replace("_", "-"), "", architecture
+
+
+def parse_dependency(dependency):
+    """Return package name of .deb dependency without version constraint.
+
+    Alternatives ("a (>= 1) | b") are returned as list of names.
+    """
+    names = [
+        sub(r"\s*\(.*?\)", "", name).strip() for name in split(r"\s*\|\s*", dependency)
+    ]
+    return names if len(names) > 1 else names[0]
+
+
+def read_desktop_entry(desktop_file):
+    """Return keys of [Desktop Entry] section of .desktop file."""
+    entry = {}
+    section = ""
+    with open(desktop_file, errors="replace") as desktop:
+        for line in desktop:
+            line = line.strip()
+            if line.startswith("["):
+                section = line
+            elif section == "[Desktop Entry]" and "=" in line:
+                key, value = line.split("=", 1)
+                entry.setdefault(key.strip(), value.strip())
+    return entry
+
+
+def read_rpm_header(mapped, offset):
+    """Return string tags of .rpm header starting at offset and offset of its end."""
+    if mapped[offset : offset + 3] != RPM_HEADER_MAGIC:
+        raise ValueError("Invalid .rpm header")
+
+    count = int.from_bytes(mapped[offset + 8 : offset + 12], "big")
+    size = int.from_bytes(mapped[offset + 12 : offset + 16], "big")
+    store = offset + 16 + count * 16
+
+    tags = {}
+    for i in range(count):
+        entry = offset + 16 + i * 16
+        tag, kind, data, number = (
+            int.from_bytes(mapped[entry + j : entry + j + 4], "big")
+            for j in range(0, 16, 4)
+        )
+        start = store + data
+        if kind in [6, 8, 9]:
+            # STRING, STRING_ARRAY and I18NSTRING (first item is the default)
+            values = []
+            for _ in range(1 if kind == 6 else number):
+                end = mapped.find(b"\0", start)
+                values.append(mapped[start:end].decode("utf-8", "replace"))
+                start = end + 1
+            tags[tag] = values if kind == 8 else values[0]
+    return tags, store + size
+
+
+def copy_stream(stream, size, file=None):
+    """Read exactly size bytes from stream and write them to file if given."""
+    while size:
+        chunk = stream.read(min(size, 1 << 20))
+        if not chunk:
+            raise ValueError("Unexpected end of archive")
+        if file:
+            file.write(chunk)
+        size -= len(chunk)
+
+
+def read_exactly(stream, size):
+    chunks = []
+    while size:
+        chunk = stream.read(size)
+        if not chunk:
+            raise ValueError("Unexpected end of archive")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def extract_cpio(stream, destination, store):
+    """Extract newc cpio archive read sequentially from stream.
+
+    Regular files are hardlinks to content-addressed blobs in store.
+    """
+    from .store import store_file
+
+    hardlinks = {}
+    while True:
+        header = read_exactly(stream, 110)
+        if header[:6] not in [b"070701", b"070702"]:
+            raise ValueError("Unsupported cpio archive format")
+        fields = [int(header[6 + i * 8 : 14 + i * 8], 16) for i in range(13)]
+        inode, mode, nlink, size, name_size = (
+            fields[0],
+            fields[1],
+            fields[4],
+            fields[6],
+            fields[11],
+        )
+        name = read_exactly(stream, name_size)[:-1].decode("utf-8", "replace")
+        copy_stream(stream, -(110 + name_size) % 4)
+        padding = -size % 4
+
+        if name == "TRAILER!!!":
+            break
+
+        name = path.normpath(name).lstrip("/")
+        if name == "." or name.split("/")[0] == "..":
+            copy_stream(stream, size + padding)
+            continue
+        target = path.join(destination, name)
+        makedirs(path.dirname(target), exist_ok=True)
+
+        if S_ISDIR(mode):
+            makedirs(target, exist_ok=True)
+        elif S_ISLNK(mode):
+            symlink(read_exactly(stream, size).decode("utf-8", "replace"), target)
+            size = 0
+        elif S_ISREG(mode):
+            # Data of hardlinked files are stored only with the last link.
+            if nlink > 1 and not size:
+                hardlinks.setdefault(inode, []).append(target)
+                continue
+            store_file(stream, size, target, mode, store)
+            for hardlink in hardlinks.pop(inode, []):
+                link(target, hardlink)
+            size = 0
+        copy_stream(stream, size + padding)
+
+    for targets in hardlinks.values():
+        for target in targets:
+            open(target, "wb").close()
+
+
+def find_files(root, pattern, cut_root=True):
+    from glob import glob
+
+    result = []
+    found = glob(root + pattern, recursive=True)
+    for item in found:
+        if cut_root:
+            result.append(item.replace(root, ""))
+        else:
+            result.append(item)
+    return result
+
+
+def collapse_paths(paths):
+    """Return sorted unique paths without the ones nested in other listed directories.
+
+    Paths are compared by their components, so "a/b" covers "a/b/c" but not "a/bc".
+    """
+    result = []
+    last = None
+    for components in sorted({tuple(p.strip("/").split("/")) for p in paths}):
+        if last is not None and components[: len(last)] == last:
+            continue
+        result.append("/".join(components))
+        last = components
+    return result